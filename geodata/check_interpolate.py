@@ -0,0 +1,109 @@
+"""Self-contained check of interpolate.py on synthetic polygons.
+
+Sources (metric coordinates, areas in m²):
+    A  0..2 x 0..2   half of it lies outside the target layer
+    B  2..3 x 0..1   fully inside Y
+    C 10..11 x 0..1  no overlap at all
+Targets:
+    X  0..1 x 0..1
+    Y  1..3 x 0..1
+"""
+import duckdb
+
+from interpolate import METRIC_CRS, build_crosswalk, check_coverage, interpolate
+
+con = duckdb.connect()
+con.execute("INSTALL spatial")
+con.execute("LOAD spatial")
+
+con.execute("""
+    CREATE TABLE src AS
+    SELECT id, ST_GeomFromText(wkt) AS geom FROM (VALUES
+        ('A', 'POLYGON((0 0, 2 0, 2 2, 0 2, 0 0))'),
+        ('B', 'POLYGON((2 0, 3 0, 3 1, 2 1, 2 0))'),
+        ('C', 'POLYGON((10 0, 11 0, 11 1, 10 1, 10 0))')
+    ) t(id, wkt)
+""")
+con.execute("""
+    CREATE TABLE tgt AS
+    SELECT id, ST_GeomFromText(wkt) AS geom FROM (VALUES
+        ('X', 'POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'),
+        ('Y', 'POLYGON((1 0, 3 0, 3 1, 1 1, 1 0))')
+    ) t(id, wkt)
+""")
+con.execute("""
+    CREATE TABLE werte AS
+    SELECT * FROM (VALUES
+        ('A', 100, 10, 40.0),
+        ('B', 50, 25, 30.0)
+    ) t(id, bevoelkerungsbestand, auslaender_innen, durchschnittsalter)
+""")
+
+crosswalk = build_crosswalk(con, "src", "tgt", "id", "id", layer_crs=METRIC_CRS)
+weights = con.execute(
+    f"SELECT source_id, target_id, area, weight, coverage FROM {crosswalk} ORDER BY ALL"
+).fetchall()
+assert weights == [
+    ("A", "X", 1.0, 0.5, 0.5),
+    ("A", "Y", 1.0, 0.5, 0.5),
+    ("B", "Y", 1.0, 1.0, 1.0),
+], weights
+
+# cache hit with the same parameters, fresh overlay with rebuild=True
+con.execute(f"DELETE FROM {crosswalk} WHERE source_id = 'B'")
+assert build_crosswalk(con, "src", "tgt", "id", "id", layer_crs=METRIC_CRS) == crosswalk
+assert con.execute(f"SELECT COUNT(*) FROM {crosswalk}").fetchone()[0] == 2
+build_crosswalk(con, "src", "tgt", "id", "id", layer_crs=METRIC_CRS, rebuild=True)
+assert con.execute(f"SELECT COUNT(*) FROM {crosswalk}").fetchone()[0] == 3
+
+# reloading a layer with other geometries invalidates the cache by itself
+con.execute("""
+    CREATE OR REPLACE TABLE tgt AS
+    SELECT id, ST_GeomFromText(wkt) AS geom FROM (VALUES
+        ('X', 'POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'),
+        ('Y', 'POLYGON((1 0, 2 0, 2 1, 1 1, 1 0))')
+    ) t(id, wkt)
+""")
+build_crosswalk(con, "src", "tgt", "id", "id", layer_crs=METRIC_CRS)
+assert con.execute(f"SELECT COUNT(*) FROM {crosswalk} WHERE source_id = 'B'").fetchone()[0] == 0
+con.execute("""
+    CREATE OR REPLACE TABLE tgt AS
+    SELECT id, ST_GeomFromText(wkt) AS geom FROM (VALUES
+        ('X', 'POLYGON((0 0, 1 0, 1 1, 0 1, 0 0))'),
+        ('Y', 'POLYGON((1 0, 3 0, 3 1, 1 1, 1 0))')
+    ) t(id, wkt)
+""")
+build_crosswalk(con, "src", "tgt", "id", "id", layer_crs=METRIC_CRS)
+assert con.execute(f"SELECT COUNT(*) FROM {crosswalk}").fetchone()[0] == 3
+
+con.execute("INSERT INTO werte VALUES ('C', 7, 1, 50.0)")
+low, unmatched = check_coverage(con, crosswalk, "werte", "id")
+assert low == [("A", 0.5)], low
+assert unmatched == ["C"], unmatched
+con.execute("DELETE FROM werte WHERE id = 'C'")
+
+res = interpolate(
+    con, crosswalk, "werte", "id", "ortsbezirk",
+    counts=["bevoelkerungsbestand", "auslaender_innen"],
+    ratios={"anteil_auslaender": ("auslaender_innen", "bevoelkerungsbestand")},
+    rates={"durchschnittsalter": "bevoelkerungsbestand"},
+).fetchall()
+assert res == [
+    ("X", 50.0, 5.0, 40.0, 10.0),
+    ("Y", 100.0, 30.0, 35.0, 30.0),
+], res
+assert sum(r[1] for r in res) == 150
+
+for bad in [
+    dict(counts=["auslaender_innen"], ratios={"anteil": ("auslaender_innen", "bevoelkerungsbestand")}),
+    dict(counts=["bevoelkerungsbestand"], rates={"bevoelkerungsbestand": None}),
+]:
+    try:
+        interpolate(con, crosswalk, "werte", "id", "ortsbezirk", **bad)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError(f"no ValueError for {bad}")
+
+con.close()
+print("interpolate checks passed")
@@ -0,0 +1,237 @@
+import sys
+from pathlib import Path
+
+import duckdb
+
+# metric CRS for Wiesbaden (ETRS89 / UTM 32N), areas in m²
+METRIC_CRS = "EPSG:25832"
+
+
+def _to_metric(layer_crs):
+    if layer_crs == METRIC_CRS:
+        return "geom"
+    return f"ST_Transform(geom, '{layer_crs}', '{METRIC_CRS}', always_xy := true)"
+
+
+def _fingerprint(con, layer, layer_id):
+    """Cheap, order-independent checksum of a layer's ids and geometries."""
+    return con.execute(f"""
+        SELECT COUNT(*) || ':' || COALESCE(BIT_XOR(HASH({layer_id}, ST_AsWKB(geom))), 0)
+        FROM {layer}
+    """).fetchone()[0]
+
+
+def build_crosswalk(con, source, target, source_id, target_id,
+                    layer_crs="EPSG:4326", rebuild=False):
+    """Overlay two polygon layers once and cache the intersection areas.
+
+    The result is a sparse crosswalk matrix in coordinate form: one row per
+    (source_id, target_id) pair that actually overlaps, with the
+    intersection area, its weight (normalised so that the weights of each
+    source sum to 1) and the share of the source polygon covered by the
+    target layer at all.
+
+    Both layers must be in `layer_crs`; they are projected to METRIC_CRS
+    for the area computation. The cached crosswalk is reused as long as
+    the id columns, the CRS and a fingerprint of both layers' geometries
+    are unchanged, so reloading a layer from the same file keeps the
+    cache. rebuild=True forces a new overlay.
+    """
+    name = f"crosswalk_{source}_{target}"
+    params = [
+        name, source, source_id, _fingerprint(con, source, source_id),
+        target, target_id, _fingerprint(con, target, target_id), layer_crs,
+    ]
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS crosswalk_meta (
+            name VARCHAR, source VARCHAR, source_id VARCHAR, source_fingerprint VARCHAR,
+            target VARCHAR, target_id VARCHAR, target_fingerprint VARCHAR, layer_crs VARCHAR
+        )
+    """)
+    cached = con.execute("""
+        SELECT COUNT(*) FROM crosswalk_meta
+        WHERE name = ? AND source = ? AND source_id = ? AND source_fingerprint = ?
+          AND target = ? AND target_id = ? AND target_fingerprint = ? AND layer_crs = ?
+    """, params).fetchone()[0]
+    exists = con.execute(
+        "SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = ?", [name]
+    ).fetchone()[0]
+    if cached and exists and not rebuild:
+        return name
+
+    # ST_Intersects as join predicate lets duckdb-spatial plan an R-tree
+    # spatial join instead of a nested loop over all polygon pairs
+    con.execute(f"DROP TABLE IF EXISTS {name}")
+    con.execute(f"""
+        CREATE TABLE {name} AS
+        WITH s AS (
+            SELECT {source_id} AS source_id, {_to_metric(layer_crs)} AS geom
+            FROM {source}
+        ),
+        t AS (
+            SELECT {target_id} AS target_id, {_to_metric(layer_crs)} AS geom
+            FROM {target}
+        ),
+        overlay AS (
+            SELECT
+                s.source_id,
+                t.target_id,
+                ST_Area(ST_Intersection(s.geom, t.geom)) AS area,
+                ST_Area(s.geom) AS source_area
+            FROM s
+            JOIN t ON ST_Intersects(s.geom, t.geom)
+        )
+        SELECT
+            source_id,
+            target_id,
+            area,
+            area / SUM(area) OVER (PARTITION BY source_id) AS weight,
+            SUM(area) OVER (PARTITION BY source_id) / source_area AS coverage
+        FROM overlay
+        WHERE area > 0
+        ORDER BY source_id, target_id
+    """)
+    con.execute("DELETE FROM crosswalk_meta WHERE name = ?", [name])
+    con.execute("INSERT INTO crosswalk_meta VALUES (?, ?, ?, ?, ?, ?, ?, ?)", params)
+    return name
+
+
+def check_coverage(con, crosswalk, data, source_id, min_coverage=0.95):
+    """Report sources the target layer barely covers and data rows that
+    have no crosswalk entry at all (their values would be lost)."""
+    low = con.execute(f"""
+        SELECT DISTINCT source_id, ROUND(coverage, 3)
+        FROM {crosswalk}
+        WHERE coverage < ?
+        ORDER BY source_id
+    """, [min_coverage]).fetchall()
+    unmatched = [r[0] for r in con.execute(f"""
+        SELECT d.{source_id}
+        FROM {data} d
+        ANTI JOIN {crosswalk} c ON d.{source_id} = c.source_id
+        ORDER BY d.{source_id}
+    """).fetchall()]
+    if low:
+        print(f"WARNING low coverage (< {min_coverage}):", low)
+    if unmatched:
+        print("WARNING no crosswalk entry:", unmatched)
+    return low, unmatched
+
+
+def interpolate(con, crosswalk, data, source_id, target_id,
+                counts=(), ratios=None, rates=None, by=()):
+    """Reallocate columns of `data` from source to target geometries.
+
+    counts: columns split across targets by crosswalk weight (W @ x).
+    ratios: {name: (numerator, denominator)}, computed in percent from the
+        reallocated counts, so they stay consistent with them.
+    rates: {column: denominator} for rates without a numerator column,
+        averaged with weight * denominator. A denominator of None falls
+        back to plain intersection-area weighting.
+
+    All columns and all `by` groups (e.g. jahr) are projected in a single
+    join + aggregate over the crosswalk.
+    """
+    ratios = ratios or {}
+    rates = rates or {}
+    for name, operands in ratios.items():
+        for col in operands:
+            if col not in counts:
+                raise ValueError(f"ratio {name!r}: {col!r} must be one of the counts")
+    seen = set()
+    for col in [*counts, *rates, *ratios]:
+        if col in seen:
+            raise ValueError(f"column {col!r} is used more than once in counts, rates and ratios")
+        seen.add(col)
+
+    group = [f"c.target_id AS {target_id}", *(f"d.{b}" for b in by)]
+    exprs = [f"SUM(c.weight * d.{col}) AS {col}" for col in counts]
+    for col, den in rates.items():
+        w = f"c.weight * d.{den}" if den else "c.area"
+        exprs.append(
+            f"SUM({w} * d.{col}) / SUM(CASE WHEN d.{col} IS NOT NULL THEN {w} END) AS {col}"
+        )
+    derived = [
+        f", {num} * 100.0 / NULLIF({den}, 0) AS {name}"
+        for name, (num, den) in ratios.items()
+    ]
+    return con.sql(f"""
+        SELECT *{"".join(derived)}
+        FROM (
+            SELECT {", ".join(group)}, {", ".join(exprs)}
+            FROM {crosswalk} c
+            JOIN {data} d ON d.{source_id} = c.source_id
+            GROUP BY ALL
+        )
+        ORDER BY ALL
+    """)
+
+
+if __name__ == "__main__":
+    wahlbezirke_file = Path("data/wahlbezirke.geojson")
+    if not wahlbezirke_file.exists():
+        sys.exit(
+            f"{wahlbezirke_file} not found: expected wahlbezirk polygons "
+            "with a 'wahlbezirk_id' property"
+        )
+
+    con = duckdb.connect("data/wiesbaden.duckdb")
+    con.execute("INSTALL spatial")
+    con.execute("LOAD spatial")
+
+    # reloading is cheap; the crosswalk is only recomputed if the
+    # geometries' fingerprint differs from the one stored with the cache
+    con.execute("DROP TABLE IF EXISTS wahlbezirke")
+    con.execute(f"""
+        CREATE TABLE wahlbezirke AS
+        SELECT wahlbezirk_id, geom FROM st_read('{wahlbezirke_file}')
+    """)
+
+    crosswalk = build_crosswalk(con, "wahlbezirke", "geo", "wahlbezirk_id", "name")
+    n = con.execute(f"SELECT COUNT(*) FROM {crosswalk}").fetchone()[0]
+    print(f"{crosswalk}: {n} overlapping pairs")
+
+    raw = con.read_csv("../bb_regwbz.csv", delimiter=";", header=True)
+    counts = [c for c in raw.columns if c not in ("wahlbezirk_id", "datum")]
+
+    con.execute("DROP TABLE IF EXISTS bevoelkerung_wahlbezirke")
+    raw.filter("wahlbezirk_id != '00'").create("bevoelkerung_wahlbezirke")
+
+    check_coverage(con, crosswalk, "bevoelkerung_wahlbezirke", "wahlbezirk_id")
+
+    res = interpolate(
+        con,
+        crosswalk,
+        "bevoelkerung_wahlbezirke",
+        "wahlbezirk_id",
+        "ortsbezirk_name",
+        counts=counts,
+        ratios={
+            "anteil_auslaender": ("auslaender_innen", "bevoelkerungsbestand"),
+            "anteil_migrationshintergrund": ("personen_mit_migrationshintergrund", "bevoelkerungsbestand"),
+        },
+        by=["datum"],
+    )
+    con.execute("DROP TABLE IF EXISTS bevoelkerung_interpoliert")
+    res.create("bevoelkerung_interpoliert")
+    print(res)
+
+    # compare against the city-wide '00' row of each datum
+    totals = raw.filter("wahlbezirk_id = '00'").select("datum, bevoelkerungsbestand AS total")
+    mismatches = con.sql("""
+        SELECT t.datum, i.interpoliert, t.total
+        FROM totals t
+        LEFT JOIN (
+            SELECT datum, SUM(bevoelkerungsbestand) AS interpoliert
+            FROM bevoelkerung_interpoliert
+            GROUP BY datum
+        ) i USING (datum)
+        WHERE ROUND(COALESCE(i.interpoliert, 0)) != t.total
+        ORDER BY t.datum
+    """).fetchall()
+    if mismatches:
+        sys.exit(f"population not conserved (datum, interpolated, total): {mismatches}")
+    print("population conserved for every datum")
+
+    con.close()